@@ -1,13 +1,15 @@
 import dataclasses
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import (
     Callable,
     Iterable,
+    Iterator,
     Literal,
     Mapping,
     Optional,
     Sequence,
-    TypeVar,
 )
 import sqlglot as sg
 
@@ -22,14 +24,13 @@ from odbc2deltalake.load_result import (
     LoadResult,
     NoLoadResult,
 )
-from .utils import is_pydantic_2
 from odbc2deltalake.sql_schema import is_string_type
-from .utils import concat_seq
+from .utils import IdentityKey, is_pydantic_2
 from odbc2deltalake.destination.destination import (
     Destination,
 )
 from odbc2deltalake.reader import DataSourceReader
-from .query import sql_quote_name
+from .query import sql_quote_name, sql_quote_value
 from .metadata import (
     table_name_type,
     InformationSchemaColInfo,
@@ -48,8 +49,6 @@ from .write_init import (
 )
 from typing import Union
 
-T = TypeVar("T")
-
 
 def _source_convert(
     name: str,
@@ -78,6 +77,45 @@ valid_from_expr = ex.cast(
 ).as_(VALID_FROM_COL_NAME, quoted=True)
 
 
+_IS_DELETED_EXPRS = {
+    v: ex.cast(ex.convert(int(v)), "bit").as_(IS_DELETED_COL_NAME, quoted=True)
+    for v in (True, False)
+}
+_IS_FULL_EXPRS = {
+    v: ex.cast(ex.convert(int(v)), "bit").as_(IS_FULL_LOAD_COL_NAME, quoted=True)
+    for v in (True, False)
+}
+
+# local (target) side counterparts, used when writing deletes
+_VALID_FROM_NOW = ex.AtTimeZone(
+    this=ex.CurrentTimestamp(),
+    zone=ex.Literal(this="UTC", is_string=True),
+).as_(VALID_FROM_COL_NAME, quoted=True)
+_IS_DELETED_TRUE = ex.convert(True).as_(IS_DELETED_COL_NAME, quoted=True)
+_IS_FULL_FALSE = ex.convert(False).as_(IS_FULL_LOAD_COL_NAME, quoted=True)
+
+
+def _pk_ds_cols(
+    pks: Sequence[InformationSchemaColInfo],
+    delta_col: Optional[InformationSchemaColInfo],
+) -> list[InformationSchemaColInfo]:
+    """The primary keys followed by the delta column"""
+    return list(pks) + ([delta_col] if delta_col is not None else [])
+
+
+@functools.lru_cache(maxsize=64)
+def _tbl(name: str, alias: Optional[str] = None, quoted: bool = False) -> ex.Table:
+    """Shared table node for the local helper tables. sqlglot builders do not copy the nodes passed in and
+    rendering copies the tree, so the node can be reused across queries as long as nobody mutates it"""
+    if quoted:
+        return table_from_tuple(name, alias=alias)
+    return ex.table_(name, alias=alias)
+
+
+def _default_target_name(c: InformationSchemaColInfo) -> str:
+    return c.column_name
+
+
 def _get_cols_select(
     cols: Sequence[InformationSchemaColInfo],
     *,
@@ -88,43 +126,43 @@ def _get_cols_select(
     system: Literal["source", "target"],
     data_type_map: Optional[Mapping[str, ex.DataType]] = None,
     get_target_name: Optional[Callable[[InformationSchemaColInfo], str]],
+    cache: Optional[dict] = None,
 ) -> Sequence[ex.Expression]:
-    if get_target_name is None:
-        get_target_name = lambda c: c.column_name
-
-    return (
-        [
-            (
+    """cache is a dict living as long as the load (WriteConfigAndInfos.expr_cache), the columns
+    of a load are identified by name within it"""
+    get_target_name = get_target_name or _default_target_name
+    # the type map only matters when converting source columns
+    key = (
+        "cols",
+        system,
+        tuple(c.column_name for c in cols),
+        table_alias,
+        IdentityKey(data_type_map) if system == "source" and data_type_map else None,
+        get_target_name,
+    )
+    col_exprs = cache.get(key) if cache is not None else None
+    if col_exprs is None:
+        if system == "source":
+            col_exprs = [
                 _source_convert(
                     c.column_name,
                     c.data_type,
                     table_alias=table_alias,
                     type_map=data_type_map,
                 ).as_(get_target_name(c), quoted=True)
-                if system == "source"
-                else ex.column(get_target_name(c), table_alias, quoted=True)
-            )
-            for c in cols
-        ]
-        + ([valid_from_expr] if with_valid_from else [])
-        + (
-            [
-                ex.cast(ex.convert(int(is_deleted)), "bit").as_(
-                    IS_DELETED_COL_NAME, quoted=True
-                )
+                for c in cols
             ]
-            if is_deleted is not None
-            else []
-        )
-        + (
-            [
-                ex.cast(ex.convert(int(is_full)), "bit").as_(
-                    IS_FULL_LOAD_COL_NAME, quoted=True
-                )
+        else:
+            col_exprs = [
+                ex.column(get_target_name(c), table_alias, quoted=True) for c in cols
             ]
-            if is_full is not None
-            else []
-        )
+        if cache is not None:
+            cache[key] = col_exprs
+    return (
+        list(col_exprs)
+        + ([valid_from_expr] if with_valid_from else [])
+        + ([_IS_DELETED_EXPRS[is_deleted]] if is_deleted is not None else [])
+        + ([_IS_FULL_EXPRS[is_full]] if is_full is not None else [])
     )
 
 
@@ -139,7 +177,24 @@ def _transform_dt(dt: dict, dialect_src: str, dialect_trg: str):
     return dt
 
 
+def _with_cached_target_names(
+    write_config: WriteConfig, cols: Sequence[InformationSchemaColInfo]
+) -> WriteConfig:
+    get_target_name = write_config.get_target_name
+    target_names = {c.column_name: get_target_name(c) for c in cols}
+
+    def _cached_target_name(c: InformationSchemaColInfo) -> str:
+        tn = target_names.get(c.column_name)
+        return tn if tn is not None else get_target_name(c)
+
+    return dataclasses.replace(write_config, get_target_name=_cached_target_name)
+
+
 def exec_write_db_to_delta(infos: WriteConfigAndInfos) -> LoadResult:
+    infos = dataclasses.replace(
+        infos,
+        write_config=_with_cached_target_names(infos.write_config, infos.col_infos),
+    )
     write_config = infos.write_config
     cols = infos.col_infos
     pk_cols = infos.pk_cols
@@ -159,7 +214,7 @@ def exec_write_db_to_delta(infos: WriteConfigAndInfos) -> LoadResult:
                 )
                 for c in cols
             ],
-            indent=4,
+            separators=(",", ":"),
         )
     )
     if source.local_delta_table_exists(
@@ -180,17 +235,9 @@ def exec_write_db_to_delta(infos: WriteConfigAndInfos) -> LoadResult:
     else:
         last_version_pk = None
     lock_file_path = destination / "meta/lock.txt"
+    _acquire_lock(lock_file_path)
 
     try:
-        if (
-            lock_file_path.exists()
-            and (
-                datetime.now(tz=timezone.utc) - lock_file_path.modified_time()
-            ).total_seconds()
-            > 60 * 60
-        ):
-            lock_file_path.remove()
-        lock_file_path.upload_str("")
         if (
             not source.local_delta_table_exists(delta_path)
             or write_config.load_mode == "overwrite"
@@ -223,12 +270,18 @@ def exec_write_db_to_delta(infos: WriteConfigAndInfos) -> LoadResult:
                     simple_check=write_config.load_mode == "simple_delta_check",
                 )
         lock_file_path.remove()
-        _vacuum(
-            source, destination / "delta_load" / DBDeltaPathConfigs.LATEST_PK_VERSION
-        )
-        _vacuum(source, destination / "delta_load" / DBDeltaPathConfigs.DELTA_1_NAME)
-        _vacuum(source, destination / "delta_load" / DBDeltaPathConfigs.DELTA_2_NAME)
-        _vacuum(source, destination / "delta_load" / DBDeltaPathConfigs.PRIMARY_KEYS_TS)
+        vacuum_paths = [
+            destination / "delta_load" / name
+            for name in (
+                DBDeltaPathConfigs.LATEST_PK_VERSION,
+                DBDeltaPathConfigs.DELTA_1_NAME,
+                DBDeltaPathConfigs.DELTA_2_NAME,
+                DBDeltaPathConfigs.PRIMARY_KEYS_TS,
+            )
+        ]
+        # the tables are independent and vacuuming is mostly object store latency
+        with ThreadPoolExecutor(max_workers=len(vacuum_paths)) as pool:
+            list(pool.map(lambda p: _vacuum(source, p), vacuum_paths))
         return load_result
     except Exception as e:
         # restore files
@@ -247,10 +300,24 @@ def exec_write_db_to_delta(infos: WriteConfigAndInfos) -> LoadResult:
     finally:
         if lock_file_path.exists():
             lock_file_path.remove()
+        source.local_forget_update_views()
         dest_logger.flush()
 
 
-def _get_latest_pk_query(
+def _acquire_lock(lock_file_path: Destination):
+    # usually there is no lock file, which costs a single conditional write
+    if lock_file_path.upload_str_if_absent(""):
+        return
+    if (
+        datetime.now(tz=timezone.utc) - lock_file_path.modified_time()
+    ).total_seconds() <= 60 * 60:
+        raise ValueError(f"{lock_file_path} exists, another load is running")
+    lock_file_path.remove()  # stale lock of a load that did not finish
+    if not lock_file_path.upload_str_if_absent(""):
+        raise ValueError(f"{lock_file_path} was taken over by another load")
+
+
+def _get_latest_pk_selects(
     reader: DataSourceReader,
     destination: Destination,
     pks: Sequence[InformationSchemaColInfo],
@@ -258,131 +325,115 @@ def _get_latest_pk_query(
     write_config: WriteConfig,
     merge_delta=False,
     delta_load_value=None,
-):
-    reader.local_register_update_view(
+    expr_cache: Optional[dict] = None,
+) -> list[ex.Select]:
+    reader.local_ensure_update_view(
         destination / f"delta_load/{DBDeltaPathConfigs.DELTA_1_NAME}",
         DBDeltaPathConfigs.DELTA_1_NAME,
     )
 
-    reader.local_register_update_view(
+    reader.local_ensure_update_view(
         destination / f"delta_load/{DBDeltaPathConfigs.DELTA_2_NAME}",
         DBDeltaPathConfigs.DELTA_2_NAME,
     )
     if not merge_delta:
-        reader.local_register_update_view(
+        reader.local_ensure_update_view(
             destination / f"delta_load/{DBDeltaPathConfigs.PRIMARY_KEYS_TS}",
             "primary_keys_ts_for_write",
         )
+    pk_names = [write_config.get_target_name(c) for c in pks]
+    pk_ds_cols = _pk_ds_cols(pks, delta_col)
 
-    def _nn(ls):
-        return [l for l in ls if l is not None]
+    def _pk_join(left_alias: str, right_alias: str):
+        return ex.and_(
+            *[
+                ex.column(n, left_alias, quoted=True).eq(
+                    ex.column(n, right_alias, quoted=True)
+                )
+                for n in pk_names
+            ]
+        )
 
-    return union(
-        _nn(
-            [
-                ex.select(
-                    *_get_cols_select(
-                        cols=concat_seq(pks, [delta_col]),
-                        table_alias="au",
-                        system="target",
-                        get_target_name=write_config.get_target_name,
-                    )
-                ).from_(table_from_tuple("delta_2", alias="au")),
-                (
-                    ex.select(
-                        *_get_cols_select(
-                            cols=concat_seq(pks, [delta_col]),
-                            table_alias="d1",
-                            system="target",
-                            get_target_name=write_config.get_target_name,
-                        )
-                    )
-                    .from_(ex.table_(DBDeltaPathConfigs.DELTA_1_NAME, alias="d1"))
-                    .join(
-                        ex.table_("delta_2", alias="au2"),
-                        ex.and_(
-                            *[
-                                ex.column(
-                                    write_config.get_target_name(c), "d1", quoted=True
-                                ).eq(
-                                    ex.column(
-                                        write_config.get_target_name(c),
-                                        "au2",
-                                        quoted=True,
-                                    )
-                                )
-                                for c in pks
-                            ]
-                        ),
-                        join_type="anti",
-                    )
-                ),
+    selects = [
+        ex.select(
+            *_get_cols_select(
+                cols=pk_ds_cols,
+                table_alias="au",
+                system="target",
+                get_target_name=write_config.get_target_name,
+                cache=expr_cache,
+            )
+        ).from_(_tbl("delta_2", "au", quoted=True)),
+        ex.select(
+            *_get_cols_select(
+                cols=pk_ds_cols,
+                table_alias="d1",
+                system="target",
+                get_target_name=write_config.get_target_name,
+                cache=expr_cache,
+            )
+        )
+        .from_(_tbl(DBDeltaPathConfigs.DELTA_1_NAME, "d1"))
+        .join(
+            _tbl("delta_2", "au2"),
+            _pk_join("d1", "au2"),
+            join_type="anti",
+        ),
+    ]
+    if not merge_delta:
+        selects.append(
+            ex.select(
+                *_get_cols_select(
+                    cols=pk_ds_cols,
+                    table_alias="cpk",
+                    system="target",
+                    get_target_name=write_config.get_target_name,
+                    cache=expr_cache,
+                )
+            )
+            .from_(_tbl("primary_keys_ts_for_write", "cpk"))
+            .where(
                 (
-                    (
-                        ex.select(
-                            *_get_cols_select(
-                                cols=concat_seq(pks, [delta_col]),
-                                table_alias="cpk",
-                                system="target",
-                                get_target_name=write_config.get_target_name,
-                            )
-                        )
-                        .from_(ex.table_("primary_keys_ts_for_write", alias="cpk"))
-                        .where(
-                            (
-                                ex.column(
-                                    write_config.get_target_name(delta_col), quoted=True
-                                )
-                                <= delta_load_value
-                            )
-                            if delta_load_value
-                            else ex.convert(True)
-                        )
-                        .join(
-                            ex.table_("delta_2", alias="au3"),
-                            ex.and_(
-                                *[
-                                    ex.column(
-                                        write_config.get_target_name(c),
-                                        "cpk",
-                                        quoted=True,
-                                    ).eq(
-                                        ex.column(
-                                            write_config.get_target_name(c),
-                                            "au3",
-                                            quoted=True,
-                                        )
-                                    )
-                                    for c in pks
-                                ]
-                            ),
-                            join_type="anti",
-                        )
-                        .join(
-                            ex.table_(DBDeltaPathConfigs.DELTA_1_NAME, alias="au4"),
-                            ex.and_(
-                                *[
-                                    ex.column(
-                                        write_config.get_target_name(c),
-                                        "cpk",
-                                        quoted=True,
-                                    ).eq(
-                                        ex.column(
-                                            write_config.get_target_name(c),
-                                            "au4",
-                                            quoted=True,
-                                        )
-                                    )
-                                    for c in pks
-                                ]
-                            ),
-                            join_type="anti",
-                        )
-                    )
-                    if not merge_delta
-                    else None
-                ),
-            ]
+                    ex.column(write_config.get_target_name(delta_col), quoted=True)
+                    <= delta_load_value
+                )
+                if delta_load_value
+                else ex.convert(True)
+            )
+            .join(
+                _tbl("delta_2", "au3"),
+                _pk_join("cpk", "au3"),
+                join_type="anti",
+            )
+            .join(
+                _tbl(DBDeltaPathConfigs.DELTA_1_NAME, "au4"),
+                _pk_join("cpk", "au4"),
+                join_type="anti",
+            )
+        )
+    return selects
+
+
+def _get_latest_pk_query(
+    reader: DataSourceReader,
+    destination: Destination,
+    pks: Sequence[InformationSchemaColInfo],
+    delta_col: InformationSchemaColInfo,
+    write_config: WriteConfig,
+    merge_delta=False,
+    delta_load_value=None,
+    expr_cache: Optional[dict] = None,
+):
+    return union(
+        _get_latest_pk_selects(
+            reader,
+            destination,
+            pks,
+            delta_col,
+            write_config,
+            merge_delta,
+            delta_load_value=delta_load_value,
+            expr_cache=expr_cache,
         ),
         distinct=False,
     )
@@ -396,8 +447,9 @@ def write_latest_pk(
     write_config: WriteConfig,
     merge_delta=False,
     delta_load_value=None,
+    expr_cache: Optional[dict] = None,
 ):
-    latest_pk_query = _get_latest_pk_query(
+    selects = _get_latest_pk_selects(
         reader,
         destination,
         pks,
@@ -405,16 +457,20 @@ def write_latest_pk(
         write_config,
         merge_delta,
         delta_load_value=delta_load_value,
+        expr_cache=expr_cache,
     )
+    # the branches are serialized one by one and glued together as text, which is a lot cheaper
+    # than building and rendering a nested union expression
+    latest_pk_sql = " UNION ALL ".join(s.sql(reader.query_dialect) for s in selects)
     if merge_delta:
         reader.local_upsert_into(
-            latest_pk_query,
+            latest_pk_sql,
             destination / "delta_load" / DBDeltaPathConfigs.LATEST_PK_VERSION,
             [write_config.get_target_name(pk) for pk in pks],
         )
     else:
         reader.local_execute_sql_to_delta(
-            latest_pk_query,
+            latest_pk_sql,
             destination / "delta_load" / DBDeltaPathConfigs.LATEST_PK_VERSION,
             mode="overwrite",
             allow_schema_drift=True,
@@ -469,22 +525,10 @@ def do_delta_load(
         f"Start { 'SIMPLE ' if simple else '' }Delta Load with Delta Column {delta_col.column_name} and pks: {', '.join((c.column_name for c in infos.pk_cols))}"
     )
 
-    if last_pk_path and not reader.local_delta_table_exists(
+    last_pk_exists = last_pk_path is not None and reader.local_delta_table_exists(
         last_pk_path
-    ):  # or do a full load?
-        logger.warning("Primary keys missing, try to restore")
-        try:
-            from .write_utils.restore_pk import restore_last_pk
-
-            restore_success = restore_last_pk(infos=infos)
-        except Exception as e:
-            logger.warning(f"Could not restore primary keys: {e}")
-            restore_success = False
-        if not restore_success:
-            logger.warning("No primary keys found, do a full load")
-            return do_full_load(infos=infos, mode="append")
-
-    elif last_pk_path and not simple:
+    )
+    if last_pk_path and last_pk_exists:
         cols = reader.get_local_delta_ops(last_pk_path).column_infos()
         cols = set((c.name.lower() for c in cols))
         pk_set = set((write_config.get_target_name(pk).lower() for pk in infos.pk_cols))
@@ -494,14 +538,7 @@ def do_delta_load(
             )
             return do_full_load(infos=infos, mode="append")
 
-    old_pk_version = (
-        reader.get_local_delta_ops(
-            destination / "delta_load" / DBDeltaPathConfigs.LATEST_PK_VERSION
-        ).version()
-        if not simple
-        else None
-    )
-    delta_path = destination / "delta"
+    # check for changes before restoring primary keys, so that an unchanged source never pays for it
     delta_load_value, current_count = get_local_delta_value_and_count(infos)
     delta_result.starting_local_state = delta_load_value, current_count
     source_delta, source_count = retrieve_source_ts_cnt(infos=infos)
@@ -514,6 +551,28 @@ def do_delta_load(
         logger.info("No updates, done")
         return NoLoadResult()
 
+    if last_pk_path and not last_pk_exists:  # or do a full load?
+        logger.warning("Primary keys missing, try to restore")
+        try:
+            from .write_utils.restore_pk import restore_last_pk
+
+            restore_success = restore_last_pk(infos=infos)
+        except Exception as e:
+            logger.warning(f"Could not restore primary keys: {e}")
+            restore_success = False
+        if not restore_success:
+            logger.warning("No primary keys found, do a full load")
+            return do_full_load(infos=infos, mode="append")
+
+    old_pk_version = (
+        reader.get_local_delta_ops(
+            destination / "delta_load" / DBDeltaPathConfigs.LATEST_PK_VERSION
+        ).version()
+        if not simple
+        else None
+    )
+    delta_path = destination / "delta"
+
     if delta_load_value is None:
         logger.warning("No delta load value, do a full load")
         return do_full_load(
@@ -541,12 +600,7 @@ def do_delta_load(
         load="delta",
         sub_load="delta_1",
     )
-    upds_sql = _get_update_sql(
-        cols=infos.col_infos,
-        criterion=criterion,
-        query=infos.from_("t"),
-        write_config=write_config,
-    )
+    upds_sql = _get_update_sql(infos, criterion)
     _load_updates_to_delta(
         logger,
         reader,
@@ -562,9 +616,12 @@ def do_delta_load(
             old_pk_version=old_pk_version,
         )
         delta_load_value = new_delta_load_value or delta_load_value
-        reader.local_register_update_view(delta_path, _temp_table(infos.table_or_query))
+        temp_name = _temp_table(infos.table_or_query)
+        reader.local_ensure_update_view(delta_path, temp_name)
 
         logger.info("Start delta step 3.5, write deletes")
+        # deletes are computed against all primary keys, while the latest pk written in step 4 only keeps the ones up to delta_load_value.
+        # so the deletes cannot just read the result of step 4, and step 2 and 3 read from the source. Hence, these are separate statements
         do_deletes(
             reader=infos.source,
             destination=infos.destination,
@@ -573,8 +630,9 @@ def do_delta_load(
             old_pk_version=old_pk_version,
             write_config=infos.write_config,
             delta_col=delta_col,
+            expr_cache=infos.expr_cache,
         )
-        reader.local_register_update_view(delta_path, _temp_table(infos.table_or_query))
+        reader.local_ensure_update_view(delta_path, temp_name)
         logger.info("Start delta step 4, write meta for next delta load")
         write_latest_pk(
             reader,
@@ -583,6 +641,7 @@ def do_delta_load(
             delta_col,
             write_config=write_config,
             delta_load_value=delta_load_value,
+            expr_cache=infos.expr_cache,
         )
 
         logger.info("Done delta load, do some last checks")
@@ -616,6 +675,7 @@ def do_delta_load(
             delta_col,
             write_config=write_config,
             merge_delta=True,
+            expr_cache=infos.expr_cache,
         )
         target_count = _get_local_pk_count(infos)
         delta_result.dirty = source_count != target_count
@@ -641,7 +701,7 @@ def do_delta_load(
 def _get_local_pk_count(infos: WriteConfigAndInfos):
     reader = infos.source
 
-    reader.local_register_update_view(
+    reader.local_ensure_update_view(
         infos.destination / "delta_load" / DBDeltaPathConfigs.LATEST_PK_VERSION,
         DBDeltaPathConfigs.LATEST_PK_VERSION,
     )
@@ -676,12 +736,7 @@ def do_append_inserts_load(infos: WriteConfigAndInfos) -> AppendOnlyLoadResult:
     _load_updates_to_delta(
         logger,
         infos.source,
-        sql=_get_update_sql(
-            cols=infos.col_infos,
-            criterion=criterion,
-            query=infos.from_("t"),
-            write_config=write_config,
-        ),
+        sql=_get_update_sql(infos, criterion),
         delta_path=infos.destination / "delta",
         delta_name="delta_1",
         write_config=write_config,
@@ -700,6 +755,7 @@ def do_deletes(
     delta_col: InformationSchemaColInfo,
     old_pk_version: int,
     write_config: WriteConfig,
+    expr_cache: Optional[dict] = None,
 ):
     latest_pk_query = _get_latest_pk_query(
         reader,
@@ -708,9 +764,10 @@ def do_deletes(
         delta_col=delta_col,
         write_config=write_config,
         merge_delta=False,
+        expr_cache=expr_cache,
     )
     LAST_PK_VERSION = "LAST_PK_VERSION"
-    reader.local_register_update_view(
+    reader.local_ensure_update_view(
         destination / f"delta_load/{ DBDeltaPathConfigs.LATEST_PK_VERSION}",
         LAST_PK_VERSION,
         version=old_pk_version,
@@ -722,19 +779,34 @@ def do_deletes(
                 table_alias="lpk",
                 system="target",
                 get_target_name=write_config.get_target_name,
+                cache=expr_cache,
             )
-        ).from_(table_from_tuple(LAST_PK_VERSION, alias="lpk")),
+        ).from_(_tbl(LAST_PK_VERSION, "lpk", quoted=True)),
         ex.select(
             *_get_cols_select(
                 pk_cols,
                 table_alias="cpk",
                 system="target",
                 get_target_name=write_config.get_target_name,
+                cache=expr_cache,
             )
-        ).from_(table_from_tuple("current_pk_version", alias="cpk")),
+        ).from_(_tbl("current_pk_version", "cpk", quoted=True)),
     ).with_("current_pk_version", as_=latest_pk_query)
+    has_deletes = (
+        len(
+            reader.local_execute_sql_to_py(
+                sg.from_(delete_query.subquery("d"))
+                .select(ex.Literal.number(1).as_("has_delete"))
+                .limit(1)
+            )
+        )
+        > 0
+    )
+    if not has_deletes:
+        return
 
-    non_pk_cols = [c for c in cols if c not in pk_cols]
+    pk_names = {c.column_name for c in pk_cols}
+    non_pk_cols = [c for c in cols if c.column_name not in pk_names]
     non_pk_select = [
         ex.Null().as_(write_config.get_target_name(c), quoted=True) for c in non_pk_cols
     ]
@@ -746,6 +818,7 @@ def do_deletes(
                     table_alias="d1",
                     system="target",
                     get_target_name=write_config.get_target_name,
+                    cache=expr_cache,
                 )
             )
             .select(
@@ -754,50 +827,31 @@ def do_deletes(
                     table_alias="d1",
                     system="target",
                     get_target_name=write_config.get_target_name,
+                    cache=expr_cache,
                 ),
                 append=True,
             )
-            .select(
-                ex.AtTimeZone(
-                    this=ex.CurrentTimestamp(),
-                    zone=ex.Literal(this="UTC", is_string=True),
-                ).as_(VALID_FROM_COL_NAME, quoted=True),
-                ex.convert(True).as_(IS_DELETED_COL_NAME, quoted=True),
-                ex.convert(False).as_(IS_FULL_LOAD_COL_NAME, quoted=True),
-            )
-            .from_(table_from_tuple("delta_1", alias="d1"))
-            .where("1=0"),  # only used to get correct datatypes
+            .select(_VALID_FROM_NOW, _IS_DELETED_TRUE, _IS_FULL_FALSE)
+            .from_(_tbl("delta_1", "d1", quoted=True))
+            # only used to get correct datatypes. Typed NULL casts would need the source types
+            # translated to the local engine, which sqlglot does not do reliably for tsql (eg. float, bit, money, xml).
+            # Both duckdb and spark fold the constant false filter into an empty relation, so no data is read
+            .where(ex.false()),
             ex.select(
                 ex.Column(this=ex.Star(), table=ex.Identifier(this="d", quoted=False))
             )
             .select(*non_pk_select, append=True)
-            .select(
-                ex.AtTimeZone(
-                    this=ex.CurrentTimestamp(),
-                    zone=ex.Literal(this="UTC", is_string=True),
-                ).as_(VALID_FROM_COL_NAME, quoted=True),
-                append=True,
-            )
-            .select(ex.convert(True).as_(IS_DELETED_COL_NAME, quoted=True), append=True)
-            .select(
-                ex.convert(False).as_(IS_FULL_LOAD_COL_NAME, quoted=True), append=True
-            )
-            .from_(table_from_tuple("deletes", alias="d")),
+            .select(_VALID_FROM_NOW, _IS_DELETED_TRUE, _IS_FULL_FALSE, append=True)
+            .from_(_tbl("deletes", "d", quoted=True)),
         ],
         distinct=False,
     ).with_("deletes", as_=delete_query)
-    reader.local_register_view(deletes_with_schema, "deletes_with_schema")
-    has_deletes = (
-        reader.local_execute_sql_to_py(count_limit_one("deletes_with_schema"))[0]["cnt"]
-        > 0
+    reader.local_execute_sql_to_delta(
+        deletes_with_schema,
+        destination / "delta",
+        mode="append",
+        allow_schema_drift=write_config.allow_schema_drift,
     )
-    if has_deletes:
-        reader.local_execute_sql_to_delta(
-            sg.from_("deletes_with_schema").select("*"),
-            destination / "delta",
-            mode="append",
-            allow_schema_drift=write_config.allow_schema_drift,
-        )
 
 
 def _retrieve_primary_key_data(
@@ -807,13 +861,12 @@ def _retrieve_primary_key_data(
         *_get_cols_select(
             is_full=None,
             is_deleted=None,
-            cols=concat_seq(
-                infos.pk_cols, [infos.delta_col] if infos.delta_col else []
-            ),
+            cols=_pk_ds_cols(infos.pk_cols, infos.delta_col),
             with_valid_from=False,
             data_type_map=infos.write_config.data_type_map,
             system="source",
             get_target_name=infos.write_config.get_target_name,
+            cache=infos.expr_cache,
         )
     )
     pk_ts_reader_sql = pk_ts_col_select.sql(infos.write_config.dialect)
@@ -829,25 +882,46 @@ def _retrieve_primary_key_data(
     return pk_path
 
 
-T = TypeVar("T")
-
-
-def _list_to_chunks(input: Iterable[T], chunk_size: int):
-    chunk: list[T] = list()
-    for item in input:
-        chunk.append(item)
-        if len(chunk) >= chunk_size:
-            yield chunk
-            chunk = list()
-    if len(chunk) > 0:
-        yield chunk
+def _chunk_by_size(items: Iterable[str], max_size: int, sep: str) -> Iterator[str]:
+    """Joins the items with sep into strings of at most max_size chars. An item longer than max_size is yielded on its own"""
+    batch: list[str] = []
+    size = 0
+    for item in items:
+        if batch and size + len(sep) + len(item) > max_size:
+            yield sep.join(batch)
+            batch = []
+            size = 0
+        size += len(item) + (len(sep) if batch else 0)
+        batch.append(item)
+    if batch:
+        yield sep.join(batch)
+
+
+_MS_PRECISION_TYPES = {ex.DataType.Type.DATETIME, ex.DataType.Type.SMALLDATETIME}
+
+
+def _values_literal(vl, data_type: Optional[ex.DataType] = None) -> str:
+    """Renders a value for a tsql VALUES list. data_type is the type the value is cast to"""
+    if isinstance(vl, str):
+        return "N'" + vl.replace("'", "''") + "'"
+    if isinstance(vl, bool):
+        return "1" if vl else "0"
+    if isinstance(vl, (bytes, bytearray)):
+        return "0x" + vl.hex()
+    if (
+        isinstance(vl, datetime)
+        and data_type is not None
+        and data_type.this in _MS_PRECISION_TYPES
+    ):
+        # datetime does not accept more than 3 fractional digits
+        return "'" + vl.isoformat(timespec="milliseconds") + "'"
+    return sql_quote_value(vl)
 
 
 def _write_delta2(
     infos: WriteConfigAndInfos, data: list[dict], mode: Literal["overwrite", "append"]
 ):
     write_config = infos.write_config
-    from .query import sql_quote_value
 
     def _collate(c: InformationSchemaColInfo):
         if is_string_type(c.data_type):
@@ -855,37 +929,34 @@ def _write_delta2(
         return ""
 
     delta_2_path = infos.destination / "delta_load" / DBDeltaPathConfigs.DELTA_2_NAME
+    p_names = ["p" + str(i) for i in range(len(infos.pk_cols))]
+    quoted_pk_names = [
+        sql_quote_name(write_config.get_target_name(c)) for c in infos.pk_cols
+    ]
 
-    def full_sql(js: str):
-        col_defs = ", ".join(
-            [
-                f"p{i} {p.data_type.sql(infos.write_config.dialect)}"
-                for i, p in enumerate(infos.pk_cols)
-            ]
-        )
+    pk_types = [c.data_type for c in infos.pk_cols]
 
-        selects = list(
-            _get_cols_select(
-                infos.col_infos,
-                is_full=False,
-                is_deleted=False,
-                with_valid_from=True,
-                table_alias="t",
-                data_type_map=write_config.data_type_map,
-                system="source",
-                get_target_name=write_config.get_target_name,
+    def _row(r: dict):
+        return (
+            "("
+            + ", ".join(
+                _values_literal(r[pn], pk_types[i]) for i, pn in enumerate(p_names)
             )
+            + ")"
         )
-        sql = infos.from_("t").select(*selects).sql(write_config.dialect)
-        pk_map = ", ".join(
-            [
-                "p" + str(i) + " as " + sql_quote_name(write_config.get_target_name(c))
-                for i, c in enumerate(infos.pk_cols)
-            ]
-        )
-        return f"""{sql}
-        inner join (SELECT {pk_map} FROM OPENJSON({sql_quote_value(js)}) with ({col_defs}) ) ttt
-             on {' AND '.join([f't.{sql_quote_name(c.column_name)} {_collate(c)} = ttt.{sql_quote_name(write_config.get_target_name(c))}' for c in infos.pk_cols])}
+
+    sql = _get_update_sql(infos, None)
+    pk_map = ", ".join(
+        [
+            f"CAST(p{i} AS {c.data_type.sql(write_config.dialect)}) as {quoted_pk_names[i]}"
+            for i, c in enumerate(infos.pk_cols)
+        ]
+    )
+    # the statement is rendered once, only the VALUES list differs between batches
+    sql_prefix = f"""{sql}
+        inner join (SELECT {pk_map} FROM (VALUES """
+    sql_suffix = f""") v({', '.join(p_names)}) ) ttt
+             on {' AND '.join([f't.{sql_quote_name(c.column_name)} {_collate(c)} = ttt.{quoted_pk_names[i]}' for i, c in enumerate(infos.pk_cols)])}
         """
 
     if mode == "overwrite":
@@ -893,34 +964,30 @@ def _write_delta2(
             "execute sql",
             load="delta",
             sub_load="delta_additional",
-            sql=full_sql(f"[/* {len(data)} entries */]"),
-        )
-    sql = full_sql(json.dumps(data, default=str))
-    if (
-        len(sql) > 7000
-    ):  ## oops, spark will not like this (actually the limit is 8000, but spark might use something on it's own)
-        ch_split = len(data) // 2
-        chunk_1 = data[:ch_split]
-        chunk_2 = data[ch_split:]
-        infos.source.source_write_sql_to_delta(
-            full_sql(json.dumps(chunk_1, default=str)),
-            delta_2_path,
-            mode=mode,
-            allow_schema_drift=write_config.allow_schema_drift,
-        )
-        infos.source.source_write_sql_to_delta(
-            full_sql(json.dumps(chunk_2, default=str)),
-            delta_2_path,
-            mode="append",
-            allow_schema_drift=write_config.allow_schema_drift,
+            sql=sql_prefix + f"/* {len(data)} entries */" + sql_suffix,
         )
+    max_sql_chars = infos.source.max_source_sql_length
+    if len(data) == 0:
+        # a row of nulls never matches the join, but keeps the query valid
+        batches = ["(" + ", ".join(["null"] * len(p_names)) + ")"]
+    elif max_sql_chars is None:
+        batches = [", ".join(_row(r) for r in data)]
     else:
-        infos.source.source_write_sql_to_delta(
-            sql,
-            delta_2_path,
-            mode=mode,
-            allow_schema_drift=write_config.allow_schema_drift,
-        )
+        values_budget = max_sql_chars - len(sql_prefix) - len(sql_suffix)
+        if values_budget <= 0:
+            # no statement can stay below the limit, keep the batches reasonably small at least
+            infos.logger.warning(
+                f"Select for additional updates is longer than {max_sql_chars} chars already"
+            )
+            values_budget = max_sql_chars // 2
+        batches = list(_chunk_by_size((_row(r) for r in data), values_budget, sep=", "))
+    # all batches go to delta in one write, so there is a single commit
+    infos.source.source_write_sqls_to_delta(
+        [sql_prefix + batch + sql_suffix for batch in batches],
+        delta_2_path,
+        mode=mode,
+        allow_schema_drift=write_config.allow_schema_drift,
+    )
 
 
 def _handle_additional_updates(
@@ -931,18 +998,17 @@ def _handle_additional_updates(
     folder = infos.destination
     delta_col = infos.delta_col
     pk_cols = infos.pk_cols
-    cols = infos.col_infos
     reader = infos.source
     logger = infos.logger
     write_config = infos.write_config
     assert delta_col is not None, "Need a delta column"
-    pk_ds_cols = concat_seq(pk_cols, [delta_col])
-    reader.local_register_update_view(
+    pk_ds_cols = _pk_ds_cols(pk_cols, delta_col)
+    reader.local_ensure_update_view(
         folder / f"delta_load/{ DBDeltaPathConfigs.PRIMARY_KEYS_TS}",
         DBDeltaPathConfigs.PRIMARY_KEYS_TS,
     )
     LAST_PK_VERSION = "LAST_PK_VERSION"
-    reader.local_register_update_view(
+    reader.local_ensure_update_view(
         folder / f"delta_load/{ DBDeltaPathConfigs.LATEST_PK_VERSION}",
         LAST_PK_VERSION,
         version=old_pk_version,
@@ -957,16 +1023,18 @@ def _handle_additional_updates(
                         table_alias="pk",
                         system="target",
                         get_target_name=write_config.get_target_name,
+                        cache=infos.expr_cache,
                     )
-                ).from_(ex.table_(DBDeltaPathConfigs.PRIMARY_KEYS_TS, alias="pk")),
+                ).from_(_tbl(DBDeltaPathConfigs.PRIMARY_KEYS_TS, "pk")),
                 ex.select(
                     *_get_cols_select(
                         cols=pk_ds_cols,
                         table_alias="lpk",
                         system="target",
                         get_target_name=write_config.get_target_name,
+                        cache=infos.expr_cache,
                     )
-                ).from_(table_from_tuple(LAST_PK_VERSION, alias="lpk")),
+                ).from_(_tbl(LAST_PK_VERSION, "lpk", quoted=True)),
             ),
             "additional_updates",
         )
@@ -1000,22 +1068,20 @@ def _handle_additional_updates(
                 table_alias="au",
                 system="target",
                 get_target_name=write_config.get_target_name,
+                cache=infos.expr_cache,
             )
-        ).from_(ex.table_("additional_updates", alias="au")),
+        ).from_(_tbl("additional_updates", "au")),
         ex.select(
             *_get_cols_select(
                 cols=pk_cols,
                 table_alias="d1",
                 system="target",
                 get_target_name=write_config.get_target_name,
+                cache=infos.expr_cache,
             )
-        ).from_(table_from_tuple("delta_1", alias="d1")),
+        ).from_(_tbl("delta_1", "d1", quoted=True)),
     )
     reader.local_register_view(sql_query, "real_additional_updates")
-    update_count: int = reader.local_execute_sql_to_py(
-        sg.from_("real_additional_updates").select(ex.Count(this=ex.Star()).as_("cnt"))
-    )[0]["cnt"]
-
     jsd = reader.local_execute_sql_to_py(
         sg.from_("real_additional_updates").select(
             *[
@@ -1026,6 +1092,7 @@ def _handle_additional_updates(
             ]
         )
     )
+    update_count = len(jsd)
 
     if update_count == 0:
         _write_delta2(infos, [], mode="overwrite")
@@ -1042,7 +1109,7 @@ def _handle_additional_updates(
                     "MIN",
                     ex.column(write_config.get_target_name(delta_col), quoted=True),
                 ).as_("min_ts")
-            ).from_(ex.table_("additional_updates", alias="rau"))
+            ).from_(_tbl("additional_updates", "rau"))
         )[0]["min_ts"]
         criterion = _source_convert(
             delta_col.column_name,
@@ -1051,12 +1118,7 @@ def _handle_additional_updates(
             type_map=write_config.data_type_map,
         ) > ex.convert(delta_load_value)
         logger.info("Start delta step 2, load updates by timestamp")
-        upds_sql = _get_update_sql(
-            cols=cols,
-            criterion=criterion,
-            query=infos.from_("t"),
-            write_config=write_config,
-        )
+        upds_sql = _get_update_sql(infos, criterion)
         logger.info(
             "execute sql", load="delta", sub_load="delta_1_additional", sql=upds_sql
         )
@@ -1070,33 +1132,11 @@ def _handle_additional_updates(
         )
         return delta_load_value
     else:
-        # we don't want to overshoot 8000 chars here because of spark. we estimate how much space in json a record of pk's will take
-
-        char_size_pks = sum(
-            [
-                5
-                + (
-                    10
-                    if p.data_type.this
-                    in [
-                        ex.DataType.Type.BOOLEAN,
-                        *ex.DataType.NUMERIC_TYPES,
-                    ]
-                    else 40
-                )
-                for p in pk_cols
-            ]
-        )
-        batch_size = max(10, int(7000 / char_size_pks))
-
         logger.warning(
-            f"Start delta step 3, load {update_count} strange updates via batches of size {batch_size}"
+            f"Start delta step 3, load {update_count} strange updates via values list"
         )
-        first = True
-        for chunk in _list_to_chunks(jsd, batch_size):
-            _write_delta2(infos, chunk, mode="overwrite" if first else "append")
-            first = False
-        reader.local_register_update_view(
+        _write_delta2(infos, jsd, mode="overwrite")
+        reader.local_ensure_update_view(
             infos.destination / "delta_load" / DBDeltaPathConfigs.DELTA_2_NAME,
             "delta_2",
         )
@@ -1109,38 +1149,51 @@ def _handle_additional_updates(
         return None
 
 
-def _get_update_sql(
-    cols: Sequence[InformationSchemaColInfo],
-    criterion: Union[Sequence[ex.Expression], ex.Expression, None],
-    query: ex.Select,
-    write_config: WriteConfig,
-):
-    if isinstance(criterion, ex.Expression):
-        criterion = [criterion]
-    delta_sql = (
-        query.select(
+def _get_source_select_sql(
+    infos: WriteConfigAndInfos, *, is_full: bool, table_alias: Union[str, None]
+) -> str:
+    """The rendered select of all columns from the source table or query, aliased as t. Cached for the load"""
+    key = ("source_select", is_full, table_alias)
+    sql = infos.expr_cache.get(key)
+    if sql is None:
+        table = infos.table_or_query
+        query = (
+            sg.from_(table.subquery().as_("t"))
+            if isinstance(table, ex.Query)
+            else sg.from_(table_from_tuple(table, "t"))
+        )
+        sql = query.select(
             *_get_cols_select(
-                cols,
-                is_full=False,
+                infos.col_infos,
+                is_full=is_full,
                 is_deleted=False,
                 with_valid_from=True,
-                table_alias="t",
-                data_type_map=write_config.data_type_map,
+                table_alias=table_alias,
+                data_type_map=infos.write_config.data_type_map,
                 system="source",
-                get_target_name=write_config.get_target_name,
-            )
-        )
-        .where(
-            *(
-                criterion
-                if criterion is not None and not isinstance(criterion, str)
-                else []
+                get_target_name=infos.write_config.get_target_name,
+                cache=infos.expr_cache,
             ),
-            dialect=write_config.dialect,
-        )
-        .sql(write_config.dialect)
+            copy=False,
+        ).sql(infos.write_config.dialect)
+        infos.expr_cache[key] = sql
+    return sql
+
+
+def _get_update_sql(
+    infos: WriteConfigAndInfos,
+    criterion: Union[Sequence[ex.Expression], ex.Expression, None],
+) -> str:
+    sql = _get_source_select_sql(infos, is_full=False, table_alias="t")
+    if isinstance(criterion, ex.Expression):
+        criterion = [criterion]
+    if not criterion or isinstance(criterion, str):
+        return sql
+    return (
+        sql
+        + " WHERE "
+        + ex.and_(*criterion, copy=False).sql(infos.write_config.dialect)
     )
-    return delta_sql
 
 
 def _load_updates_to_delta(
@@ -1162,7 +1215,7 @@ def _load_updates_to_delta(
         mode="overwrite",
         allow_schema_drift=write_config.allow_schema_drift,
     )
-    reader.local_register_update_view(delta_name_path, delta_name)
+    reader.local_ensure_update_view(delta_name_path, delta_name)
     count = reader.local_execute_sql_to_py(count_limit_one(delta_name))[0]["cnt"]
     if count == 0:
         return
@@ -1183,21 +1236,7 @@ def do_full_load(
     reader = infos.source
 
     logger.info("Start Full Load")
-    sql = (
-        infos.from_("t")
-        .select(
-            *_get_cols_select(
-                is_deleted=False,
-                is_full=True,
-                cols=infos.col_infos,
-                with_valid_from=True,
-                data_type_map=write_config.data_type_map,
-                system="source",
-                get_target_name=write_config.get_target_name,
-            )
-        )
-        .sql(write_config.dialect)
-    )
+    sql = _get_source_select_sql(infos, is_full=True, table_alias=None)
     logger.info("executing sql", sql=sql, load="full")
     reader.source_write_sql_to_delta(
         sql, delta_path, mode=mode, allow_schema_drift=write_config.allow_schema_drift
@@ -1207,35 +1246,32 @@ def do_full_load(
         return FullLoadResult()
     logger.info(" Full Load done, write meta for delta load")
 
-    reader.local_register_update_view(delta_path, _temp_table(infos.table_or_query))
+    temp_name = _temp_table(infos.table_or_query)
+    reader.local_ensure_update_view(delta_path, temp_name)
     (delta_path.parent / "delta_load").mkdir()
-    ident = ex.to_identifier(_temp_table(infos.table_or_query))
+    ident = ex.to_identifier(temp_name)
     query = (
         sg.from_(ident)
         .select(
-            *(
-                [
-                    ex.column(write_config.get_target_name(pk), quoted=True)
-                    for pk in infos.pk_cols
-                ]
-                + (
-                    [
-                        ex.column(
-                            write_config.get_target_name(infos.delta_col), quoted=True
-                        )
-                    ]
-                    if infos.delta_col
-                    else []
-                )
-            )
+            *_get_cols_select(
+                _pk_ds_cols(infos.pk_cols, infos.delta_col),
+                system="target",
+                get_target_name=write_config.get_target_name,
+                cache=infos.expr_cache,
+            ),
+            copy=False,
         )
         .where(
             ex.column(VALID_FROM_COL_NAME, quoted=True).eq(
                 sg.from_(ident)
-                .select(ex.func("MAX", ex.column(VALID_FROM_COL_NAME, quoted=True)))
-                .where(ex.column(IS_FULL_LOAD_COL_NAME, quoted=True))
-                .subquery()
-            )
+                .select(
+                    ex.func("MAX", ex.column(VALID_FROM_COL_NAME, quoted=True)),
+                    copy=False,
+                )
+                .where(ex.column(IS_FULL_LOAD_COL_NAME, quoted=True), copy=False)
+                .subquery(copy=False)
+            ),
+            copy=False,
         )
     )
     reader.local_execute_sql_to_delta(
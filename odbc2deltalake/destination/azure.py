@@ -39,6 +39,17 @@ class AzureDestination(Destination):
         with self.fs.open(self.to_az_path(), "w", encoding="utf-8") as f:
             f.write(data)  # type: ignore
 
+    def upload_str_if_absent(self, data: str):
+        from azure.core.exceptions import ResourceExistsError
+
+        fs, path = self.get_fs_path()
+        try:
+            # without overwrite, the blob is uploaded with If-None-Match: *
+            fs.pipe_file(path, data.encode("utf-8"), overwrite=False)
+            return True
+        except (FileExistsError, ResourceExistsError):
+            return False
+
     def modified_time(self):
         fs, path = self.get_fs_path()
         return fs.modified(path)
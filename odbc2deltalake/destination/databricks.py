@@ -34,6 +34,15 @@ class DatabricksDestination(Destination):
     def upload_str(self, data: str):
         self.dbutils.fs.put(self.to_az_path(), data, overwrite=True)
 
+    def upload_str_if_absent(self, data: str):
+        try:
+            self.dbutils.fs.put(self.to_az_path(), data, overwrite=False)
+            return True
+        except Exception:
+            if self.exists():
+                return False
+            raise
+
     def modified_time(self):
         res = self.dbutils.fs.ls(self.to_az_path())
         assert len(res) == 1
@@ -28,6 +28,14 @@ class Destination(ABC):
     def upload_str(self, data: str):
         pass
 
+    def upload_str_if_absent(self, data: str) -> bool:
+        """Uploads data only if nothing exists at this path yet. Returns False if something already existed.
+        This default is not atomic, override it where the storage supports conditional writes."""
+        if self.exists():
+            return False
+        self.upload_str(data)
+        return True
+
     @abstractmethod
     def modified_time(self) -> datetime:
         pass
@@ -29,6 +29,14 @@ class FileSystemDestination(Destination):
         with open(self.path, "w", encoding="utf-8") as f:
             f.write(data)
 
+    def upload_str_if_absent(self, data: str):
+        try:
+            with open(self.path, "x", encoding="utf-8") as f:
+                f.write(data)
+            return True
+        except FileExistsError:
+            return False
+
     def modified_time(self):
         fs, path = self.get_fs_path()
         return fs.modified(path)
@@ -1,3 +1,5 @@
+import functools
+import os
 from typing import Literal, Union
 
 from odbc2deltalake.query import sql_quote_name
@@ -13,31 +15,17 @@ if is_pydantic_2:
 table_name_type = Union[str, tuple[str, str], tuple[str, str, str]]
 
 
+@functools.lru_cache(maxsize=1024)
+def _build_type(type_name: str, dialect: str) -> ex.DataType:
+    # type names repeat a lot (eg. nvarchar(100)), parsing them is the expensive part
+    return ex.DataType.build(type_name, dialect=dialect)
+
+
 def get_primary_keys(
     reader: DataSourceReader, table_name: table_name_type, *, dialect: str
 ) -> list[str]:
-    if isinstance(table_name, str):
-        table_name = ("dbo", table_name)
-    real_table_name = table_name[1] if len(table_name) == 2 else table_name[2]
-    real_schema = table_name[0] if len(table_name) == 2 else table_name[1]
-    real_db = table_name[0] if len(table_name) == 3 else None
-    quoted_db = sql_quote_name(real_db) + "." if real_db else ""
-
-    query = sqlglot.parse_one(
-        f"""SELECT ccu.COLUMN_NAME
-    FROM {quoted_db}INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc WITH(NOLOCK)
-        JOIN {quoted_db}INFORMATION_SCHEMA.CONSTRAINT_COLUMN_USAGE ccu WITH(NOLOCK) ON tc.CONSTRAINT_NAME = ccu.Constraint_name
-    WHERE tc.CONSTRAINT_TYPE = 'Primary Key'""",
-        dialect=dialect,
-    )
-    assert isinstance(query, ex.Select)
-    query = query.where(
-        ex.column("TABLE_NAME", "ccu")
-        .eq(ex.convert(real_table_name))
-        .and_(ex.column("TABLE_SCHEMA", "ccu").eq(ex.convert(real_schema)))
-    )
-    full_query = query.sql(dialect)
-    return [d["COLUMN_NAME"] for d in reader.source_sql_to_py(full_query)]
+    """The primary key column names of a table, in the order of the key"""
+    return get_table_metadata(reader, table_name, dialect=dialect)[1]
 
 
 class FieldWithType(BaseModel):
@@ -65,16 +53,19 @@ class InformationSchemaColInfo(BaseModel):
     is_identity: bool = False
 
 
-def _get_table_cols(
-    reader: DataSourceReader, table_name: table_name_type, *, dialect: str
-):
-    if isinstance(table_name, str):
-        table_name = ("dbo", table_name)
-    real_table_name = table_name[1] if len(table_name) == 2 else table_name[2]
-    real_schema = table_name[0] if len(table_name) == 2 else table_name[1]
-    real_db = table_name[0] if len(table_name) == 3 else None
-    quoted_db = sql_quote_name(real_db) + "." if real_db else ""
+def _col_info_factory():
+    """Creates column infos from rows of the system tables without validation, those are trusted.
+    Set ODBC2DELTALAKE_DEBUG to validate them anyway"""
+    if os.getenv("ODBC2DELTALAKE_DEBUG", "0") not in ("", "0"):
+        return InformationSchemaColInfo
+    if is_pydantic_2:
+        return InformationSchemaColInfo.model_construct
+    return InformationSchemaColInfo.construct
 
+
+@functools.lru_cache(maxsize=64)
+def _table_metadata_query(quoted_db: str, dialect: str) -> ex.Select:
+    # parsed once per database, callers must not modify the result
     query = sqlglot.parse_one(
         f""" SELECT  ccu.column_name, ccu.column_default,
 		cast(case when ccu.IS_NULLABLE='YES' THEN 1 ELSE 0 END as bit) as is_nullable,
@@ -84,7 +75,12 @@ def _get_table_cols(
 		numeric_scale,
 		datetime_precision,
         ci.generated_always_type_desc,
-        coalesce(ci.is_identity, convert(bit, 0)) as is_identity FROM {quoted_db}INFORMATION_SCHEMA.COLUMNS ccu
+        coalesce(ci.is_identity, convert(bit, 0)) as is_identity,
+        (
+            SELECT pku.ORDINAL_POSITION FROM {quoted_db}INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc WITH(NOLOCK)
+                JOIN {quoted_db}INFORMATION_SCHEMA.KEY_COLUMN_USAGE pku WITH(NOLOCK) ON tc.CONSTRAINT_NAME = pku.CONSTRAINT_NAME and tc.CONSTRAINT_SCHEMA = pku.CONSTRAINT_SCHEMA
+            WHERE tc.CONSTRAINT_TYPE = 'Primary Key' and pku.TABLE_SCHEMA = ccu.TABLE_SCHEMA and pku.TABLE_NAME = ccu.TABLE_NAME and pku.COLUMN_NAME = ccu.COLUMN_NAME
+        ) as pk_ordinal FROM {quoted_db}INFORMATION_SCHEMA.COLUMNS ccu
         left join (
 			
 SELECT sc.name as schema_name, t.name as table_name, c.name as col_name, c.generated_always_type_desc, c.is_identity as is_identity FROM {quoted_db}sys.columns c 
@@ -95,13 +91,36 @@ SELECT sc.name as schema_name, t.name as table_name, c.name as col_name, c.gener
         dialect=dialect,
     )
     assert isinstance(query, ex.Select)
+    return query
+
+
+def get_table_metadata(
+    reader: DataSourceReader, table_name: table_name_type, *, dialect: str
+) -> tuple[list[InformationSchemaColInfo], list[str]]:
+    """Returns the columns and the primary key column names of a table, using a single query.
+    The primary keys are in the order of the key"""
+    if isinstance(table_name, str):
+        table_name = ("dbo", table_name)
+    real_table_name = table_name[1] if len(table_name) == 2 else table_name[2]
+    real_schema = table_name[0] if len(table_name) == 2 else table_name[1]
+    real_db = table_name[0] if len(table_name) == 3 else None
+    quoted_db = sql_quote_name(real_db) + "." if real_db else ""
+
+    # where copies the cached template
+    query = _table_metadata_query(quoted_db, dialect)
     full_query = query.where(
         ex.column("TABLE_NAME", "ccu")
         .eq(ex.convert(real_table_name))
-        .and_(ex.column("TABLE_SCHEMA", "ccu").eq(ex.convert(real_schema)))
+        .and_(ex.column("TABLE_SCHEMA", "ccu").eq(ex.convert(real_schema)), copy=False)
     ).sql(dialect)
     dicts = reader.source_sql_to_py(full_query)
+    pks: list[tuple[int, str]] = []
     for d in dicts:
+        pk_ordinal = d.pop("pk_ordinal")
+        if pk_ordinal is not None:
+            pks.append((pk_ordinal, d["column_name"]))
+        d["is_nullable"] = bool(d["is_nullable"])
+        d["is_identity"] = bool(d["is_identity"])
         dt = d.pop("data_type")
         max_len = d.pop("character_maximum_length")
         numeric_precision = d.pop("numeric_precision")
@@ -120,8 +139,9 @@ SELECT sc.name as schema_name, t.name as table_name, c.name as col_name, c.gener
         elif datetime_precision:
             dt_str += f"({datetime_precision})"
 
-        d["data_type"] = ex.DataType.build(dt_str, dialect=dialect)
-    return [InformationSchemaColInfo(**d) for d in dicts]
+        d["data_type"] = _build_type(dt_str, dialect)
+    col_info = _col_info_factory()
+    return [col_info(**d) for d in dicts], [name for _, name in sorted(pks)]
 
 
 def _get_query_cols_first_result_set(
@@ -133,19 +153,23 @@ def _get_query_cols_first_result_set(
         + "'"
     )
 
-    dicts = reader.source_sql_to_py(sql)
-
-    for d in dicts:
-        sys_type_name = d["system_type_name"]
-
-        yield InformationSchemaColInfo(
-            column_name=d["name"],
-            data_type=ex.DataType.build(sys_type_name, dialect=dialect),
-            column_default=None,
-            is_identity=d["is_identity_column"],
-            generated_always_type_desc="NOT_APPLICABLE",
-            is_nullable=d["is_nullable"],
-        )
+    col_info = _col_info_factory()
+    # only a few of the many result columns are needed, read them column wise
+    for batch in reader.source_sql_to_arrow(sql):
+        for name, sys_type_name, is_identity, is_nullable in zip(
+            batch.column("name").to_pylist(),
+            batch.column("system_type_name").to_pylist(),
+            batch.column("is_identity_column").to_pylist(),
+            batch.column("is_nullable").to_pylist(),
+        ):
+            yield col_info(
+                column_name=name,
+                data_type=_build_type(sys_type_name, dialect),
+                column_default=None,
+                is_identity=bool(is_identity),
+                generated_always_type_desc="NOT_APPLICABLE",
+                is_nullable=bool(is_nullable),
+            )
 
 
 def get_columns(
@@ -167,7 +191,7 @@ def get_columns(
             )
 
     else:
-        return _get_table_cols(reader, table_or_query, dialect=dialect)
+        return get_table_metadata(reader, table_or_query, dialect=dialect)[0]
 
 
 def get_compatibility_level(reader: DataSourceReader) -> int:
@@ -3,7 +3,15 @@ from pathlib import Path
 from odbc2deltalake.destination.destination import Destination
 from odbc2deltalake.reader.reader import ColInfo, DeltaOps
 from .reader import DataSourceReader
-from typing import TYPE_CHECKING, Literal, Mapping, Optional, Sequence, Union
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+)
 from sqlglot.expressions import Query, DataType
 import sqlglot as sg
 
@@ -233,7 +241,7 @@ class ODBCReader(DataSourceReader):
 
     def local_execute_sql_to_delta(
         self,
-        sql: Query,
+        sql: Union[str, Query],
         delta_path: Destination,
         mode: Literal["overwrite", "append"],
         *,
@@ -245,8 +253,10 @@ class ODBCReader(DataSourceReader):
 
         self.duck_con = self.duck_con or duckdb.connect(self.local_db)
 
+        if isinstance(sql, Query):
+            sql = sql.sql(self.query_dialect)
         with self.duck_con.cursor() as cur:
-            cur.execute(sql.sql(self.query_dialect))
+            cur.execute(sql)
             dp, do = delta_path.as_path_options("object_store")
             batch_reader = cur.fetch_record_batch()
             schema = batch_reader.schema
@@ -298,16 +308,19 @@ class ODBCReader(DataSourceReader):
         ]
 
     def source_sql_to_py(self, sql: Union[str, Query]) -> list[dict]:
+        result = list()
+        for batch in self.source_sql_to_arrow(sql):
+            result.extend(batch.to_pylist())
+        return result
+
+    def source_sql_to_arrow(self, sql: Union[str, Query]) -> "Iterable[pa.RecordBatch]":
         if isinstance(sql, Query):
             sql = sql.sql("tsql")
         from arrow_odbc import read_arrow_batches_from_odbc
 
-        result = list()
-        for batch in read_arrow_batches_from_odbc(
+        return read_arrow_batches_from_odbc(
             sql, self.connection_string, max_text_size=20000
-        ):
-            result.extend(batch.to_pylist())
-        return result
+        )
 
     def source_write_sql_to_delta(
         self,
@@ -380,7 +393,7 @@ class ODBCReader(DataSourceReader):
 
     def local_upsert_into(
         self,
-        local_sql_source: Query,
+        local_sql_source: Union[str, Query],
         target_delta: Destination,
         merge_cols: Sequence[str],
     ):
@@ -388,8 +401,10 @@ class ODBCReader(DataSourceReader):
 
         self.duck_con = self.duck_con or duckdb.connect(self.local_db)
 
+        if isinstance(local_sql_source, Query):
+            local_sql_source = local_sql_source.sql(self.query_dialect)
         with self.duck_con.cursor() as cursor:
-            cursor.execute(local_sql_source.sql(self.query_dialect))
+            cursor.execute(local_sql_source)
             dt = target_delta.as_delta_table()
             res = (
                 dt.merge(
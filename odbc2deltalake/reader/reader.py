@@ -1,10 +1,23 @@
 from odbc2deltalake.destination.destination import Destination
 import logging
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Literal, Mapping, Protocol, Any, Sequence, Union
+import functools
+import inspect
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Literal,
+    Mapping,
+    Optional,
+    Protocol,
+    Any,
+    Sequence,
+    Union,
+)
 from sqlglot.expressions import Query
 
 if TYPE_CHECKING:
+    import pyarrow as pa
     from odbc2deltalake.metadata import InformationSchemaColInfo
 
 logger = logging.getLogger(__name__)
@@ -33,7 +46,41 @@ class DeltaOps(Protocol):
     def set_nullable(self, cols: Mapping[str, bool]): ...
 
 
+def _forgets_update_views(write_method):
+    """Wraps a method writing to delta so views registered by local_ensure_update_view on the target get registered again"""
+    # the target is the parameter after the data to write, it may be passed by keyword
+    target_param = list(inspect.signature(write_method).parameters)[2]
+
+    @functools.wraps(write_method)
+    def wrapper(self: "DataSourceReader", *args, **kwargs):
+        try:
+            return write_method(self, *args, **kwargs)
+        finally:
+            self.local_forget_update_views(
+                args[1] if len(args) > 1 else kwargs[target_param]
+            )
+
+    return wrapper
+
+
 class DataSourceReader(ABC):
+    _registered_update_views: Optional[dict[str, tuple[str, Union[int, None]]]] = None
+
+    # all of them take the data to write and the target delta table as the first two arguments
+    _DELTA_WRITE_METHODS = (
+        "source_write_sql_to_delta",
+        "source_write_sqls_to_delta",
+        "local_execute_sql_to_delta",
+        "local_pylist_to_delta",
+        "local_upsert_into",
+    )
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in DataSourceReader._DELTA_WRITE_METHODS:
+            if name in cls.__dict__:
+                setattr(cls, name, _forgets_update_views(cls.__dict__[name]))
+
     @property
     @abstractmethod
     def supports_proc_exec(self) -> bool:
@@ -44,6 +91,11 @@ class DataSourceReader(ABC):
     def query_dialect(self) -> str:
         pass
 
+    @property
+    def max_source_sql_length(self) -> Optional[int]:
+        """Maximum length of a statement sent to the source, None if there is no limit"""
+        return None
+
     @abstractmethod
     def local_delta_table_exists(
         self, delta_path: Destination, extended_check=False
@@ -61,6 +113,22 @@ class DataSourceReader(ABC):
     ):
         pass
 
+    def source_write_sqls_to_delta(
+        self,
+        sqls: Sequence[str],
+        delta_path: Destination,
+        mode: Literal["overwrite", "append"],
+        *,
+        allow_schema_drift: Union[bool, Literal["new_only"]],
+    ):
+        """Writes the results of all statements to delta, as if they were combined with UNION ALL.
+        Readers should override this to write everything with a single commit."""
+        for sql in sqls:
+            self.source_write_sql_to_delta(
+                sql, delta_path, mode, allow_schema_drift=allow_schema_drift
+            )
+            mode = "append"
+
     @abstractmethod
     def source_schema_limit_one(self, sql: Query) -> "list[InformationSchemaColInfo]":
         pass
@@ -69,6 +137,16 @@ class DataSourceReader(ABC):
     def source_sql_to_py(self, sql: Union[str, Query]) -> list[dict]:
         pass
 
+    def source_sql_to_arrow(self, sql: Union[str, Query]) -> "Iterable[pa.RecordBatch]":
+        """Same as source_sql_to_py, but returns the result column wise as arrow batches.
+        Readers that get arrow data from the source should override this"""
+        rows = self.source_sql_to_py(sql)
+        if len(rows) == 0:
+            return []  # without rows, there is nothing to infer the columns from
+        import pyarrow as pa
+
+        return [pa.RecordBatch.from_pylist(rows)]
+
     @abstractmethod
     def local_execute_sql_to_py(self, sql: Query) -> list[dict]:
         pass
@@ -80,7 +158,7 @@ class DataSourceReader(ABC):
     @abstractmethod
     def local_execute_sql_to_delta(
         self,
-        sql: Query,
+        sql: Union[str, Query],
         delta_path: Destination,
         mode: Literal["overwrite", "append"],
         *,
@@ -115,8 +193,41 @@ class DataSourceReader(ABC):
     @abstractmethod
     def local_upsert_into(
         self,
-        local_sql_source: Query,
+        local_sql_source: Union[str, Query],
         target_delta: Destination,
         merge_cols: Sequence[str],
     ):
         pass
+
+    def local_ensure_update_view(
+        self,
+        delta_path: Destination,
+        view_name: str,
+        *,
+        version: Union[int, None] = None,
+    ):
+        """Like local_register_update_view, but skips the registration if the view already points to the same delta table and version.
+        Writes through the reader forget the views of the target table, so they get registered again."""
+        if self._registered_update_views is None:
+            self._registered_update_views = dict()
+        key = (str(delta_path), version)
+        if self._registered_update_views.get(view_name) == key:
+            return
+        self.local_register_update_view(delta_path, view_name, version=version)
+        self._registered_update_views[view_name] = key
+
+    def local_forget_update_views(self, delta_path: Optional[Destination] = None):
+        """Forgets registrations done by local_ensure_update_view, either all of them or the ones reading from delta_path"""
+        if not self._registered_update_views:
+            return
+        if delta_path is None:
+            self._registered_update_views.clear()
+            return
+        path_str = str(delta_path)
+        # writes may run on several threads, so iterate over a snapshot
+        for view_name in [
+            vn
+            for vn, (vp, _) in list(self._registered_update_views.items())
+            if vp == path_str
+        ]:
+            self._registered_update_views.pop(view_name, None)
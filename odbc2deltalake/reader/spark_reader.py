@@ -120,13 +120,15 @@ class SparkReader(DataSourceReader):
 
     def local_execute_sql_to_delta(
         self,
-        sql: Query,
+        sql: Union[str, Query],
         delta_path: Destination,
         mode: Literal["overwrite", "append"],
         *,
         allow_schema_drift: Union[bool, Literal["new_only"]],
     ):
-        df = self.spark.sql(sql.sql(self._dialect))
+        if isinstance(sql, Query):
+            sql = sql.sql(self._dialect)
+        df = self.spark.sql(sql)
         writer = df.write.format("delta")
         if allow_schema_drift == "new_only":
             self._append_new_cols(delta_path, df.schema)
@@ -159,6 +161,11 @@ class SparkReader(DataSourceReader):
     def supports_proc_exec(self):
         return False
 
+    @property
+    def max_source_sql_length(self):
+        # spark does not like statements longer than 8000 chars (and might use something on it's own)
+        return 7000
+
     def _query(self, sql: Union[str, Query]):
         if isinstance(sql, Query):
             sql = sql.sql("tsql")
@@ -281,10 +288,38 @@ class SparkReader(DataSourceReader):
         allow_schema_drift: Union[bool, Literal["new_only"]],
     ):
         reader = self._reader(sql)
-        reader = self.transformation_hook(reader.load(), "sql2delta")
-        writer = reader.write.format("delta")
+        self._write_df_to_delta(
+            self.transformation_hook(reader.load(), "sql2delta"),
+            delta_path,
+            mode,
+            allow_schema_drift,
+        )
+
+    def source_write_sqls_to_delta(
+        self,
+        sqls: Sequence[str],
+        delta_path: Destination,
+        mode: Literal["overwrite", "append"],
+        *,
+        allow_schema_drift: Union[bool, Literal["new_only"]],
+    ):
+        df = self.transformation_hook(self._reader(sqls[0]).load(), "sql2delta")
+        for sql in sqls[1:]:
+            df = df.unionByName(
+                self.transformation_hook(self._reader(sql).load(), "sql2delta")
+            )
+        self._write_df_to_delta(df, delta_path, mode, allow_schema_drift)
+
+    def _write_df_to_delta(
+        self,
+        df: "DataFrame",
+        delta_path: Destination,
+        mode: Literal["overwrite", "append"],
+        allow_schema_drift: Union[bool, Literal["new_only"]],
+    ):
+        writer = df.write.format("delta")
         if allow_schema_drift == "new_only":
-            self._append_new_cols(delta_path, reader.schema)
+            self._append_new_cols(delta_path, df.schema)
         elif allow_schema_drift:
             writer = writer.option(
                 "mergeSchema" if mode == "append" else "overwriteSchema", "true"
@@ -296,14 +331,16 @@ class SparkReader(DataSourceReader):
 
     def local_upsert_into(
         self,
-        local_sql_source: Query,
+        local_sql_source: Union[str, Query],
         target_delta: Destination,
         merge_cols: Sequence[str],
     ):
         from delta.tables import DeltaTable
 
         assert len(merge_cols) > 0
-        df_source = self.spark.sql(local_sql_source.sql(self._dialect))
+        if isinstance(local_sql_source, Query):
+            local_sql_source = local_sql_source.sql(self._dialect)
+        df_source = self.spark.sql(local_sql_source)
 
         DeltaTable.forPath(self.spark, str(target_delta)).alias("tgt").merge(
             df_source.alias("src"),
@@ -1,4 +1,4 @@
-from typing import TypeVar, Sequence
+from typing import Generic, TypeVar, Sequence
 
 T = TypeVar("T")
 
@@ -6,13 +6,29 @@ T = TypeVar("T")
 def concat_seq(*args: Sequence[T]) -> Sequence[T]:
     if len(args) == 1:
         return args[0]
-    r = list()
+    r: list[T] = list()
     for a in args:
-        r = r + a  # type: ignore
+        r.extend(a)
 
     return r
 
 
+class IdentityKey(Generic[T]):
+    """Wraps an object so it can be used as a cache key by identity, even if it is not hashable.
+    Keeps a reference to the object, so the id cannot be reused while the key is alive."""
+
+    __slots__ = ("obj",)
+
+    def __init__(self, obj: T):
+        self.obj = obj
+
+    def __hash__(self) -> int:
+        return id(self.obj)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, IdentityKey) and other.obj is self.obj
+
+
 def _is_pydantic_2() -> bool:
     import pydantic
 
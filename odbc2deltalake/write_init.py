@@ -9,8 +9,8 @@ from odbc2deltalake.destination.destination import (
 from odbc2deltalake.logging import StorageBackend
 from odbc2deltalake.reader import DataSourceReader
 from .metadata import (
-    get_primary_keys,
     get_columns,
+    get_table_metadata,
     InformationSchemaColInfo,
 )
 import sqlglot.expressions as ex
@@ -90,7 +90,7 @@ class WriteConfig:
     """Set this if you want to map stuff like decimal to double before writing to delta. We recommend doing so later in ETL usually"""
 
     no_complex_entries_load: bool = False
-    """If true, will not load 'strange updates' via OPENJSON. Use if your db does not support OPENJSON or you're fine to get some additional updates in order to reduce complexity"""
+    """If true, will not load 'strange updates' by joining a VALUES list of primary keys. Use if your db does not support this or you're fine to get some additional updates in order to reduce complexity"""
 
     get_target_name: Callable[[InformationSchemaColInfo], str] = dataclasses.field(
         default_factory=lambda: compat_name
@@ -111,6 +111,10 @@ class WriteConfigAndInfos:
     source: DataSourceReader
     table_or_query: Union[ex.Query, tuple[str, str], str]
     logger: DeltaLogger
+    expr_cache: dict = dataclasses.field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    """Expressions and sql built during the load. Not copied by dataclasses.replace"""
 
     def execute(self):
         from .db_to_delta import exec_write_db_to_delta
@@ -174,7 +178,13 @@ def make_writer(
         from .reader.odbc_reader import ODBCReader
 
         source = ODBCReader(source)
-    cols = get_columns(source, table_or_query, dialect=write_config.dialect)
+    if isinstance(table_or_query, ex.Query):
+        cols = get_columns(source, table_or_query, dialect=write_config.dialect)
+        table_pks: list[str] = []
+    else:
+        cols, table_pks = get_table_metadata(
+            source, table_or_query, dialect=write_config.dialect
+        )
 
     if write_config.delta_col:
         delta_col = next(
@@ -197,12 +207,8 @@ def make_writer(
         delta_col = get_delta_col(cols, write_config.dialect)
 
     _pks = write_config.primary_keys
-    if _pks is None and (
-        isinstance(table_or_query, str) or isinstance(table_or_query, tuple)
-    ):
-        _pks = get_primary_keys(source, table_or_query, dialect=write_config.dialect)
-    elif _pks is None:
-        _pks = []
+    if _pks is None:
+        _pks = table_pks
     pk_cols: Sequence[InformationSchemaColInfo] = []
     for pk in _pks:
         pk_col = next(
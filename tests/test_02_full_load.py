@@ -5,7 +5,7 @@ import duckdb
 from datetime import date
 
 from odbc2deltalake.query import sql_quote_value
-from .utils import config_names, get_test_run_configs
+from .utils import config_names, get_test_run_configs, wait_until_after
 
 
 if TYPE_CHECKING:
@@ -29,9 +29,6 @@ def test_first_load_always_full(
         ("long schema", "long table name_as_view"),
         dest,
     )
-    import time
-
-    time.sleep(2)
     with duckdb.connect() as con:
         duckdb_create_view_for_delta(
             con, (dest / "delta").as_delta_table(), "v_long_table_name_temp"
@@ -42,6 +39,8 @@ def test_first_load_always_full(
         assert res is not None
         max_valid_from = res[0]
         assert max_valid_from is not None
+    # the assertions below filter on __timestamp > max_valid_from
+    wait_until_after(max_valid_from)
 
     with connection.new_connection(conf_name) as nc:
         with nc.cursor() as cursor:
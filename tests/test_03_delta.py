@@ -2,7 +2,12 @@ from typing import TYPE_CHECKING
 import pytest
 from deltalake2db import duckdb_create_view_for_delta
 import duckdb
-from .utils import write_db_to_delta_with_check, config_names, get_test_run_configs
+from .utils import (
+    write_db_to_delta_with_check,
+    config_names,
+    get_test_run_configs,
+    wait_until_after,
+)
 
 from odbc2deltalake.query import sql_quote_value
 
@@ -44,9 +49,6 @@ def test_delta(
             dicts = [dict(zip(cols, row)) for row in alls]
             print(alls)
 
-    import time
-
-    time.sleep(2)
     with duckdb.connect() as con:
         duckdb_create_view_for_delta(
             con, (dest / "delta").as_delta_table(), "v_user_2_temp"
@@ -61,6 +63,8 @@ def test_delta(
         assert res is not None
         max_valid_from = res[0]
         assert max_valid_from is not None
+    # the assertions below filter on __timestamp > max_valid_from
+    wait_until_after(max_valid_from)
 
     _, l2 = write_db_to_delta_with_check(
         reader,
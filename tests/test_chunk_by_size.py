@@ -0,0 +1,22 @@
+from odbc2deltalake.db_to_delta import _chunk_by_size
+
+
+def test_chunk_by_size():
+    assert list(_chunk_by_size([], 10, sep=", ")) == []
+
+    # the separator counts towards the size
+    assert list(_chunk_by_size(["aa", "bb", "cc"], 6, sep=", ")) == ["aa, bb", "cc"]
+    assert list(_chunk_by_size(["aa", "bb", "cc"], 5, sep=", ")) == ["aa", "bb", "cc"]
+    assert list(_chunk_by_size(["aa", "bb", "cc"], 10, sep=", ")) == ["aa, bb, cc"]
+
+    # an item longer than max_size is yielded on its own
+    assert list(_chunk_by_size(["a", "toolongitem", "b", "c"], 4, sep=",")) == [
+        "a",
+        "toolongitem",
+        "b,c",
+    ]
+
+    items = [str(i) for i in range(1000)]
+    chunks = list(_chunk_by_size(items, 50, sep=", "))
+    assert all(len(c) <= 50 for c in chunks)
+    assert ", ".join(chunks) == ", ".join(items)
@@ -0,0 +1,28 @@
+import os
+import time
+
+import pytest
+
+from odbc2deltalake.db_to_delta import _acquire_lock
+from odbc2deltalake.destination.file_system import FileSystemDestination
+
+
+def test_upload_str_if_absent(tmp_path):
+    dest = FileSystemDestination(tmp_path / "lock.txt")
+    assert dest.upload_str_if_absent("first")
+    assert not dest.upload_str_if_absent("second")
+    assert (tmp_path / "lock.txt").read_text(encoding="utf-8") == "first"
+
+
+def test_acquire_lock(tmp_path):
+    dest = FileSystemDestination(tmp_path / "lock.txt")
+    _acquire_lock(dest)
+    assert dest.exists()
+
+    with pytest.raises(ValueError):
+        _acquire_lock(dest)
+
+    two_hours_ago = time.time() - 2 * 60 * 60
+    os.utime(tmp_path / "lock.txt", (two_hours_ago, two_hours_ago))
+    _acquire_lock(dest)  # a stale lock is taken over
+    assert time.time() - os.path.getmtime(tmp_path / "lock.txt") < 60
@@ -0,0 +1,89 @@
+from unittest.mock import MagicMock
+
+from pydantic import ValidationError
+import pytest
+
+import sqlglot as sg
+
+from odbc2deltalake.metadata import (
+    _get_query_cols_first_result_set,
+    get_primary_keys,
+    get_table_metadata,
+)
+from odbc2deltalake.reader.reader import DataSourceReader
+
+
+def _col(name: str, data_type: str, pk_ordinal=None, **kwargs):
+    return {
+        "column_name": name,
+        "column_default": None,
+        "is_nullable": False,
+        "data_type": data_type,
+        "character_maximum_length": None,
+        "numeric_precision": None,
+        "numeric_scale": None,
+        "datetime_precision": None,
+        "generated_always_type_desc": "NOT_APPLICABLE",
+        "is_identity": False,
+        "pk_ordinal": pk_ordinal,
+    } | kwargs
+
+
+def _reader_with_composite_key():
+    reader = MagicMock()
+    # the rows come in column order, which is not the order of the key
+    reader.source_sql_to_py.side_effect = lambda sql: [
+        _col("second_id", "int", 2),
+        _col("name", "nvarchar", character_maximum_length=100, is_nullable=True),
+        _col("first_id", "bigint", 1),
+        _col("third_id", "varchar", 3, character_maximum_length=-1),
+    ]
+    return reader
+
+
+def test_get_primary_keys_in_key_order():
+    reader = _reader_with_composite_key()
+    assert get_primary_keys(reader, ("dbo", "t"), dialect="tsql") == [
+        "first_id",
+        "second_id",
+        "third_id",
+    ]
+
+
+def test_get_table_metadata():
+    reader = _reader_with_composite_key()
+    cols, pks = get_table_metadata(reader, ("dbo", "t"), dialect="tsql")
+    assert [c.column_name for c in cols] == [
+        "second_id",
+        "name",
+        "first_id",
+        "third_id",
+    ]
+    assert pks == ["first_id", "second_id", "third_id"]
+    assert cols[1].data_type.sql("tsql") == "NVARCHAR(100)"
+    assert cols[3].data_type.sql("tsql") == "VARCHAR(MAX)"
+    assert cols[1].is_nullable and not cols[0].is_nullable
+
+
+def test_get_table_metadata_validates_in_debug(monkeypatch):
+    reader = MagicMock()
+    reader.source_sql_to_py.side_effect = lambda sql: [
+        _col("id", "int", 1, generated_always_type_desc="SOMETHING_NEW")
+    ]
+    cols, _ = get_table_metadata(reader, ("dbo", "t"), dialect="tsql")
+    assert cols[0].generated_always_type_desc == "SOMETHING_NEW"
+
+    monkeypatch.setenv("ODBC2DELTALAKE_DEBUG", "1")
+    with pytest.raises(ValidationError):
+        get_table_metadata(reader, ("dbo", "t"), dialect="tsql")
+
+
+def test_query_cols_without_result():
+    reader = MagicMock()
+    reader.source_sql_to_py.return_value = []
+    # the default implementation converts source_sql_to_py
+    reader.source_sql_to_arrow.side_effect = (
+        lambda sql: DataSourceReader.source_sql_to_arrow(reader, sql)
+    )
+    query = sg.select("1 as a")
+    assert list(_get_query_cols_first_result_set(reader, query, dialect="tsql")) == []
@@ -0,0 +1,72 @@
+from odbc2deltalake.destination.file_system import FileSystemDestination
+from odbc2deltalake.reader.reader import DataSourceReader
+
+
+class _FakeReader(DataSourceReader):
+    def __init__(self):
+        self.registered: list[tuple[str, str]] = []
+
+    supports_proc_exec = False  # type: ignore
+    query_dialect = "duckdb"  # type: ignore
+
+    def local_delta_table_exists(self, delta_path, extended_check=False):
+        return True
+
+    def source_write_sql_to_delta(self, sql, delta_path, mode, *, allow_schema_drift):
+        pass
+
+    def source_schema_limit_one(self, sql):
+        return []
+
+    def source_sql_to_py(self, sql):
+        return []
+
+    def local_execute_sql_to_py(self, sql):
+        return []
+
+    def get_local_delta_ops(self, delta_path):
+        raise NotImplementedError()
+
+    def local_execute_sql_to_delta(self, sql, delta_path, mode, *, allow_schema_drift):
+        pass
+
+    def local_pylist_to_delta(self, pylist, delta_path, mode, dummy_record=None):
+        pass
+
+    def local_register_view(self, sql, view_name):
+        pass
+
+    def local_register_update_view(self, delta_path, view_name, *, version=None):
+        self.registered.append((str(delta_path), view_name))
+
+    def local_upsert_into(self, local_sql_source, target_delta, merge_cols):
+        pass
+
+
+def test_update_view_registered_again_after_write(tmp_path):
+    reader = _FakeReader()
+    dest = FileSystemDestination(tmp_path)
+    other = dest / "other"
+    reader.local_ensure_update_view(dest, "v")
+    reader.local_ensure_update_view(other, "o")
+    reader.local_ensure_update_view(dest, "v")
+    assert reader.registered == [(str(dest), "v"), (str(other), "o")]
+
+    reader.source_write_sql_to_delta(
+        "select 1", dest, "append", allow_schema_drift=False
+    )
+    reader.local_ensure_update_view(dest, "v")
+    reader.local_ensure_update_view(other, "o")
+    assert reader.registered[2:] == [(str(dest), "v")]
+
+    reader.local_upsert_into("select 1", target_delta=dest, merge_cols=["id"])
+    reader.local_ensure_update_view(dest, "v")
+    assert reader.registered[3:] == [(str(dest), "v")]
+
+    # the default implementation writes through source_write_sql_to_delta
+    reader.source_write_sqls_to_delta(
+        ["select 1", "select 2"], other, "overwrite", allow_schema_drift=False
+    )
+    reader.local_ensure_update_view(dest, "v")
+    reader.local_ensure_update_view(other, "o")
+    assert reader.registered[4:] == [(str(other), "o")]
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import sqlglot.expressions as ex
+
+from odbc2deltalake.db_to_delta import _values_literal
+
+
+def test_values_literal():
+    dt = datetime(2024, 1, 2, 3, 4, 5, 123456)
+    assert (
+        _values_literal(dt, ex.DataType.build("datetime", dialect="tsql"))
+        == "'2024-01-02T03:04:05.123'"
+    )
+    assert (
+        _values_literal(dt, ex.DataType.build("smalldatetime", dialect="tsql"))
+        == "'2024-01-02T03:04:05.123'"
+    )
+    assert (
+        _values_literal(dt, ex.DataType.build("datetime2(6)", dialect="tsql"))
+        == "'2024-01-02T03:04:05.123456'"
+    )
+    assert _values_literal(b"\x00\xffab") == "0x00ff6162"
+    assert _values_literal(bytearray(b"\x01")) == "0x01"
+    assert _values_literal("it's") == "N'it''s'"
+    assert _values_literal(True) == "1"
+    assert _values_literal(None) == "null"
+    assert _values_literal(5) == "5"
@@ -8,7 +8,9 @@ from sqlglot import from_
 import sqlglot.expressions as ex
 from odbc2deltalake import make_writer, DataSourceReader, WriteConfig, Destination
 from odbc2deltalake.consistency import check_latest_pk
+from datetime import datetime, timedelta, timezone
 import os
+import time
 
 if TYPE_CHECKING:
     from tests.conftest import DB_Connection
@@ -26,6 +28,23 @@ def _ntz(df_in: pd.DataFrame):
     return df
 
 
+def wait_until_after(ts: datetime):
+    """Waits until the current UTC time is strictly after ts, so that the next load gets later timestamps"""
+    # GETUTCDATE() is only precise to about 3ms, and might round down to ts otherwise
+    ts = ts + timedelta(milliseconds=4)
+    deadline = time.monotonic() + 5
+    while True:
+        now = datetime.now(tz=timezone.utc)
+        if ts.tzinfo is None:
+            now = now.replace(tzinfo=None)
+        if now > ts:
+            return
+        assert (
+            time.monotonic() < deadline
+        ), f"{ts} is still in the future after 5 seconds, do the clocks of the db and this machine differ?"
+        time.sleep(0.01)
+
+
 def check_latest_pk_pandas(infos: WriteConfigAndInfos):
     lpk_path = infos.destination / "delta_load" / DBDeltaPathConfigs.LATEST_PK_VERSION
     lpk_df = lpk_path.as_delta_table()